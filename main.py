@@ -2,10 +2,10 @@
 import requests
 import os
 import datetime
-import pytz
 import json
 import yfinance as yf
 import get_bloomberg
+from next_gen import trading_calendar
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,15 +20,25 @@ DAILY_PERCENT_THRESHOLD = 2
 LOW_52_WEEK_PERCENT_THRESHOLD = 3
 
 
-def get_current_price(instrument):
+LAST_BARS_FILE = 'last_bars.json'
+
+
+def get_current_bar(instrument):
     data = yf.Ticker(instrument).history(period="1d", interval="1m")
-    
+
     if not data.empty:
-        return data['Close'].iloc[-1]
+        bar_end = data.index[-1].to_pydatetime() + datetime.timedelta(minutes=1)
+        return data['Close'].iloc[-1], bar_end
     else:
         return None
 
 
+def get_current_price(instrument):
+    bar = get_current_bar(instrument)
+
+    return bar[0] if bar else None
+
+
 def get_previous_close(instrument):
     data = yf.Ticker(instrument).history(period="5d", interval="1d")
     
@@ -156,6 +166,28 @@ def send_top_news():
 
 
 
+def get_last_bar(filename):
+    try:
+        with open(filename, 'r') as json_file:
+            last_bar = json.load(json_file).get('legacy')
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    return datetime.datetime.fromisoformat(last_bar) if last_bar else None
+
+
+def save_last_bar(filename, last_bar):
+    try:
+        with open(filename, 'r') as json_file:
+            last_bars = json.load(json_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        last_bars = {}
+
+    last_bars['legacy'] = last_bar.isoformat()
+    with open(filename, 'w') as json_file:
+        json.dump(last_bars, json_file)
+
+
 def get_index_names(filename):
     with open(filename, 'r') as json_file:
         loaded_list = json.load(json_file)
@@ -167,25 +199,39 @@ if __name__ == '__main__':
     # Send top news
     # send_top_news()
 
+    now = datetime.datetime.now(trading_calendar.MARKET_TZ)
+
+    # Nothing new to fetch once the bars from the last run are the newest ones,
+    # which covers weekends, holidays and pre-open runs after a processed close
+    if not trading_calendar.has_new_data(get_last_bar(LAST_BARS_FILE), now):
+        print("No new market data since last run - nothing to check.")
+        raise SystemExit(0)
+
     # Check for news relating to large price movements on a limited list
+    bar_ends = []
     for (i, instrument) in enumerate(STOCK_NAMES):
-        current_px = get_current_price(instrument)
+        current_bar = get_current_bar(instrument)
+        current_px = current_bar[0] if current_bar else None
         previous_close = get_previous_close(instrument)
         low_52_wk = get_52_wk_low(instrument)
 
+        if current_bar is not None:
+            bar_ends.append(current_bar[1])
+
         # print(f"Current Price: {current_px}")
         # print(f"Previous Price: {previous_close}")
         # print(f"52 Week Low: {low_52_wk}")
 
         send_daily_updates(instrument, current_px, previous_close)
 
-    target_time = datetime.time(16, 00, 0)
-
-    eastern_timezone = pytz.timezone('US/Eastern')
-    current_time = datetime.datetime.now(eastern_timezone).time()
+    # Only mark bars as processed once every watchlist symbol was fetched
+    newest_bar = min(bar_ends) if len(bar_ends) == len(STOCK_NAMES) else None
 
-    # Only check 52 week lows after the close
-    if current_time >= target_time:
+    # Only check 52 week lows once the last session's closing bar is in
+    # (1pm on early-close days), catching up on a missed post-close run
+    last_session = trading_calendar.last_completed_session(now)
+    if (newest_bar is not None and not trading_calendar.is_market_open(now)
+            and newest_bar >= trading_calendar.session_close(last_session)):
         sp_500_names = get_index_names('index_names.txt')
         for instrument in sp_500_names:
             current_px = get_current_price(instrument)
@@ -194,3 +240,5 @@ if __name__ == '__main__':
             if current_px is not None and low_52_wk is not None:
                 send_52_week_lows(instrument, current_px, low_52_wk)
 
+    if newest_bar is not None:
+        save_last_bar(LAST_BARS_FILE, newest_bar)
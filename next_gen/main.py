@@ -4,11 +4,15 @@ Next-gen stock tracking application using modern yfinance and pandas.
 Monitors stock prices and sends alerts via Discord webhook.
 """
 import argparse
+import time
 from datetime import datetime
 
 import get_bloomberg
+import scan_journal
+import trading_calendar
 from stock_tracker import (
     STOCK_NAMES,
+    get_current_bar,
     get_current_price,
     get_previous_close,
     get_52_week_low,
@@ -17,6 +21,9 @@ from stock_tracker import (
     send_discord_message,
     load_index_symbols,
     is_market_closed,
+    load_last_bar,
+    save_last_bar,
+    sync_price_history,
 )
 
 
@@ -37,24 +44,50 @@ def run_daily_updates() -> None:
     """Monitor watchlist for daily price movements."""
     print(f"\nStarting daily updates at {datetime.now()}")
     
+    last_bar = load_last_bar('daily')
+    if not trading_calendar.has_new_data(last_bar):
+        print(f"No new market data since {last_bar:%Y-%m-%d %H:%M %Z} - skipping daily updates")
+        return
+    
+    bar_ends = []
     for symbol in STOCK_NAMES:
         print(f"\nChecking {symbol}...")
-        current_price = get_current_price(symbol)
+        current_bar = get_current_bar(symbol)
         previous_close = get_previous_close(symbol)
         
-        if current_price is not None and previous_close is not None:
+        if current_bar is not None and previous_close is not None:
+            current_price, bar_end = current_bar
+            bar_ends.append(bar_end)
             print(f"  Current: ${current_price:.2f}, Previous Close: ${previous_close:.2f}")
             send_daily_updates(symbol, current_price, previous_close)
         else:
             print(f"  Unable to fetch prices for {symbol}")
+    
+    # Only mark bars as processed once every watchlist symbol was fetched
+    if len(bar_ends) == len(STOCK_NAMES):
+        save_last_bar('daily', min(bar_ends))
+
 
+def run_52_week_low_checks(time_budget: float | None = None) -> None:
+    """Check 52-week lows for index symbols (typically after market close).
 
-def run_52_week_low_checks() -> None:
-    """Check 52-week lows for index symbols (typically after market close)."""
+    Symbols closest to their low on earlier runs are checked first, then
+    symbols not checked recently.
+    Progress is journaled per symbol so a killed run, or one that runs out
+    of time_budget seconds, resumes where it stopped instead of re-sending
+    alerts that were already delivered.
+    """
     if not is_market_closed():
         print("\nMarket still open - skipping 52-week low checks")
         return
     
+    started = time.monotonic()
+    run_id = trading_calendar.last_completed_session().isoformat()
+    last_summary = scan_journal.load_last_summary()
+    if last_summary.get('run_id') == run_id:
+        print(f"\nNo new market data since the {run_id} scan - skipping 52-week low checks")
+        return
+    
     print("\nMarket closed - checking 52-week lows...")
     index_symbols = load_index_symbols('index_names.txt')
     
@@ -62,20 +95,80 @@ def run_52_week_low_checks() -> None:
         print("No index symbols loaded")
         return
     
+    completed = scan_journal.load_journal(run_id)
+    index_symbols = scan_journal.prioritize_symbols(
+        index_symbols, scan_journal.load_last_summary(), run_id
+    )
+    if completed:
+        print(f"Resuming run {run_id}: {len(completed)} symbols already processed")
+    
     print(f"Checking {len(index_symbols)} symbols for 52-week lows...")
     checked = 0
-    for symbol in index_symbols:
-        current_price = get_current_price(symbol)
-        low_52_week = get_52_week_low(symbol)
-        
-        if current_price is not None and low_52_week is not None:
-            send_52_week_low_alert(symbol, current_price, low_52_week)
+    undelivered = 0
+    with scan_journal.open_journal() as journal:
+        for symbol in index_symbols:
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                print(
+                    f"Time budget of {time_budget:g}s exhausted: checked {checked}/"
+                    f"{len(index_symbols)} symbols ({checked / len(index_symbols):.0%} coverage)"
+                )
+                print("Remaining symbols will be checked on the next run")
+                return
+            
+            checked += 1
+            if symbol in completed:
+                continue
+            
+            current_price = get_current_price(symbol)
+            low_52_week = get_52_week_low(symbol)
+            
+            if current_price is None or low_52_week is None:
+                # Journal the failure so a resumed run does not fetch it again
+                scan_journal.record_result(journal, run_id, symbol, {'percent_from_low': None})
+            else:
+                alerted = send_52_week_low_alert(symbol, current_price, low_52_week)
+                
+                # Leave undelivered alerts out of the journal so a resumed run retries them
+                if alerted is False:
+                    print(f"  Alert for {symbol} not delivered - will retry on the next run")
+                    undelivered += 1
+                else:
+                    scan_journal.record_result(journal, run_id, symbol, {
+                        'price': current_price,
+                        'low_52_week': low_52_week,
+                        'percent_from_low': (current_price - low_52_week) / low_52_week * 100,
+                        'alerted': bool(alerted),
+                    })
+            
+            if checked % 50 == 0:
+                print(f"  Checked {checked}/{len(index_symbols)} symbols...")
+    
+    if undelivered:
+        print(f"Checked {checked} symbols; {undelivered} alerts will be retried on the next run")
+        return
+    
+    scan_journal.compact_journal(run_id)
+    print(f"Completed checking {checked} symbols in {time.monotonic() - started:.1f}s")
+
+
+def run_price_sync() -> None:
+    """Bring the shared price matrix up to date for index symbols."""
+    index_symbols = load_index_symbols('index_names.txt')
+    
+    if not index_symbols:
+        print("No index symbols loaded")
+        return
+    
+    print(f"\nSyncing daily price history for {len(index_symbols)} symbols...")
+    fetched = 0
+    for checked, symbol in enumerate(index_symbols, start=1):
+        if sync_price_history(symbol):
+            fetched += 1
         
-        checked += 1
         if checked % 50 == 0:
-            print(f"  Checked {checked}/{len(index_symbols)} symbols...")
+            print(f"  Synced {checked}/{len(index_symbols)} symbols...")
     
-    print(f"Completed checking {checked} symbols")
+    print(f"Price matrix updated: fetched {fetched}, {len(index_symbols) - fetched} already current")
 
 
 def main():
@@ -98,16 +191,27 @@ def main():
         action='store_true',
         help='Check for 52-week lows'
     )
+    parser.add_argument(
+        '--sync-prices',
+        action='store_true',
+        help='Update the shared price matrix with daily bars for index symbols'
+    )
     parser.add_argument(
         '--all',
         action='store_true',
         help='Run all checks (news, daily updates, and 52-week lows)'
     )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        metavar='SECONDS',
+        help='Stop the 52-week low scan after this many seconds and resume it on the next run'
+    )
     
     args = parser.parse_args()
     
     # If no specific flags, run daily updates AND 52-week lows (matching original behavior)
-    if not any([args.news, args.daily, args.lows, args.all]):
+    if not any([args.news, args.daily, args.lows, args.sync_prices, args.all]):
         args.daily = True
         args.lows = True
     
@@ -121,8 +225,11 @@ def main():
     if args.all or args.daily:
         run_daily_updates()
     
+    if args.sync_prices:
+        run_price_sync()
+    
     if args.all or args.lows:
-        run_52_week_low_checks()
+        run_52_week_low_checks(args.time_budget)
     
     print("\n" + "=" * 60)
     print("Stock tracker completed")
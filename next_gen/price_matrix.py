@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped daily price matrix shared across runs and processes.
+Stores split-adjusted, dividend-unadjusted float32 close/low/volume as a
+dense (field x symbol x trading day) array in a .npy file, plus a JSON index
+of symbols, trading days and the contiguous history held for each symbol.
+Readers map the file read-only, so any number of processes share one copy
+through the page cache; only the fetch layer writes to it.
+"""
+import os
+import json
+import fcntl
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import trading_calendar
+
+INDEX_FILE = "price_matrix.json"
+
+FIELDS = ('close', 'low', 'volume')
+TRADING_DAYS_PER_YEAR = 252
+
+# Minimum capacity allocated when the matrix grows, to keep rewrites rare
+MIN_SYMBOL_CAPACITY = 64
+MIN_DAY_CAPACITY = 2 * TRADING_DAYS_PER_YEAR
+
+
+def load_index(index_file: str = INDEX_FILE) -> dict:
+    """Load the index: matrix file, symbols, trading days and per-symbol coverage.
+
+    The index is the commit point for writers: cells outside the symbols and
+    dates it lists are never read.
+    """
+    try:
+        with open(index_file, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'matrix': None, 'generation': 0, 'symbols': [], 'dates': [], 'coverage': {}}
+
+
+def _save_index(index: dict, index_file: str) -> None:
+    tmp_file = f"{index_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, index_file)
+
+
+def _matrix_path(index: dict, index_file: str) -> str:
+    return os.path.join(os.path.dirname(index_file), index['matrix'])
+
+
+@contextmanager
+def _writer_lock(index_file: str):
+    """Serialize writers across processes; readers never take the lock."""
+    with open(f"{index_file}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def trading_dates(index: dict) -> list[date]:
+    """Trading day for each column of the matrix."""
+    return [date.fromisoformat(day) for day in index['dates']]
+
+
+def history_coverage(symbol: str, index_file: str = INDEX_FILE) -> tuple[date, date] | None:
+    """First and last day of the contiguous history stored for a symbol."""
+    coverage = load_index(index_file)['coverage'].get(symbol)
+    if coverage is None:
+        return None
+    return date.fromisoformat(coverage[0]), date.fromisoformat(coverage[1])
+
+
+def open_matrix(index_file: str = INDEX_FILE) -> tuple[np.ndarray, dict]:
+    """Map the matrix read-only without copying it.
+
+    Returns the (field, symbol, day) array trimmed to the committed region
+    together with its index. Missing values are NaN.
+    """
+    for attempt in range(2):
+        index = load_index(index_file)
+        if not index['symbols']:
+            return np.empty((len(FIELDS), 0, 0), dtype=np.float32), index
+        try:
+            matrix = np.load(_matrix_path(index, index_file), mmap_mode='r')
+            break
+        except FileNotFoundError:
+            # A writer replaced the matrix between reading the index and mapping it
+            if attempt:
+                raise
+    return matrix[:, :len(index['symbols']), :len(index['dates'])], index
+
+
+def _rewrite(index: dict, index_file: str, symbols: int, dates: list[date],
+             old_dates: list[date]) -> tuple[np.ndarray, str]:
+    """Copy the matrix into a new, larger file with old columns remapped.
+
+    The new file is only referenced once the index is saved, so a crash
+    before then leaves the committed matrix untouched.
+    """
+    old = None
+    if index['matrix']:
+        old = np.load(_matrix_path(index, index_file), mmap_mode='r')
+        old = old[:, :len(index['symbols']), :len(old_dates)]
+
+    old_symbols, old_days = old.shape[1:] if old is not None else (0, 0)
+    shape = (
+        len(FIELDS),
+        max(symbols, MIN_SYMBOL_CAPACITY, 2 * old_symbols),
+        max(len(dates), MIN_DAY_CAPACITY, 2 * old_days),
+    )
+    generation = index['generation'] + 1
+    matrix_name = f"price_matrix.{generation}.npy"
+    grown = np.lib.format.open_memmap(
+        os.path.join(os.path.dirname(index_file), matrix_name),
+        mode='w+', dtype=np.float32, shape=shape,
+    )
+    grown[:] = np.nan
+    if old is not None:
+        columns = np.searchsorted(np.array(dates), np.array(old_dates))
+        grown[:, :old_symbols, columns] = old
+    return grown, matrix_name
+
+
+def _merge_coverage(existing: list[str] | None, start: date, end: date) -> list[str]:
+    """Extend a symbol's contiguous history; a disjoint window is not merged."""
+    if existing is None:
+        return [start.isoformat(), end.isoformat()]
+
+    first, last = date.fromisoformat(existing[0]), date.fromisoformat(existing[1])
+    if start <= trading_calendar.next_trading_day(last) and first <= trading_calendar.next_trading_day(end):
+        return [min(first, start).isoformat(), max(last, end).isoformat()]
+    return existing
+
+
+def record_bars(symbol: str, bars: pd.DataFrame, covered_from: date | None = None,
+                index_file: str = INDEX_FILE) -> None:
+    """Write daily bars (a yfinance history frame, auto_adjust=False) into the matrix.
+
+    covered_from is the first day the fetch asked for, so a window with no
+    bars at its start still counts as covered; it defaults to the first bar.
+    Bars for a session still in progress are ignored. Only the affected
+    cells are written unless new symbols or days outgrow the file.
+    """
+    if bars.empty:
+        return
+
+    # Skip the in-progress session so only final daily bars are stored
+    last_session = trading_calendar.last_completed_session()
+    bars = bars.dropna(subset=['Close'])
+    bars = bars[[ts.date() <= last_session for ts in bars.index]]
+    if bars.empty:
+        return
+    bar_dates = [ts.date() for ts in bars.index]
+
+    with _writer_lock(index_file):
+        index = load_index(index_file)
+        old_dates = trading_dates(index)
+        symbols = index['symbols']
+        is_new_symbol = symbol not in symbols
+        if is_new_symbol:
+            symbols = [*symbols, symbol]
+
+        # Sessions are fixed once stored; the calendar only fills days outside them
+        start = min([*bar_dates, *old_dates[:1]])
+        end = max([*bar_dates, *old_dates[-1:]])
+        wanted = set(old_dates) | set(bar_dates)
+        wanted.update(
+            day for day in trading_calendar.trading_days(start, end)
+            if not old_dates or not old_dates[0] <= day <= old_dates[-1]
+        )
+        dates = sorted(wanted)
+
+        matrix = np.load(_matrix_path(index, index_file), mmap_mode='r+') if index['matrix'] else None
+        old_matrix = index['matrix']
+        if (matrix is None or dates[:len(old_dates)] != old_dates
+                or len(symbols) > matrix.shape[1] or len(dates) > matrix.shape[2]):
+            matrix, index['matrix'] = _rewrite(index, index_file, len(symbols), dates, old_dates)
+            index['generation'] += 1
+        else:
+            # Cells outside the committed index may hold a crashed writer's data
+            if is_new_symbol:
+                matrix[:, len(symbols) - 1, :] = np.nan
+            matrix[:, :, len(old_dates):len(dates)] = np.nan
+
+        column = {day: i for i, day in enumerate(dates)}
+        columns = [column[day] for day in bar_dates]
+        values = bars[['Close', 'Low', 'Volume']].to_numpy(dtype=np.float32)
+        matrix[:, symbols.index(symbol), columns] = values.T
+        matrix.flush()
+        del matrix
+
+        index['symbols'] = symbols
+        index['dates'] = [day.isoformat() for day in dates]
+        index['coverage'][symbol] = _merge_coverage(
+            index['coverage'].get(symbol), covered_from or min(bar_dates), max(bar_dates)
+        )
+        _save_index(index, index_file)
+
+        if old_matrix and old_matrix != index['matrix']:
+            os.remove(os.path.join(os.path.dirname(index_file), old_matrix))
+
+
+def reset_history(symbol: str, index_file: str = INDEX_FILE) -> None:
+    """Forget a symbol's stored bars, e.g. after a split changed its price basis.
+
+    Coverage is dropped and committed before the row is cleared, so a crash
+    in between only leaves cells that no coverage vouches for.
+    """
+    with _writer_lock(index_file):
+        index = load_index(index_file)
+        if symbol not in index['symbols']:
+            return
+
+        index['coverage'].pop(symbol, None)
+        _save_index(index, index_file)
+
+        matrix = np.load(_matrix_path(index, index_file), mmap_mode='r+')
+        matrix[:, index['symbols'].index(symbol), :] = np.nan
+        matrix.flush()
+
+
+def fifty_two_week_lows(index_file: str = INDEX_FILE) -> dict[str, float]:
+    """52-week low of every symbol, computed at once.
+
+    Only symbols whose stored history covers the full year up to the latest
+    stored session are reported.
+    """
+    matrix, index = open_matrix(index_file)
+    if not index['dates']:
+        return {}
+
+    latest = date.fromisoformat(index['dates'][-1])
+    year_ago = latest - timedelta(days=365)
+
+    def covers_year(symbol: str) -> bool:
+        coverage = index['coverage'].get(symbol)
+        return (coverage is not None and date.fromisoformat(coverage[0]) <= year_ago
+                and date.fromisoformat(coverage[1]) >= latest)
+
+    full_history = np.array([covers_year(symbol) for symbol in index['symbols']])
+    lows = matrix[FIELDS.index('low'), :, -TRADING_DAYS_PER_YEAR:]
+    populated = full_history & ~np.isnan(lows).all(axis=1)
+    minimums = np.full(lows.shape[0], np.nan, dtype=np.float32)
+    minimums[populated] = np.nanmin(lows[populated], axis=1)
+    return {
+        symbol: float(low)
+        for symbol, low, ok in zip(index['symbols'], minimums, populated)
+        if ok
+    }
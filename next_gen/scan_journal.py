@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Append-only progress journal for long symbol scans.
+Lets an interrupted 52-week low scan resume where it stopped without
+re-sending alerts that were already delivered.
+"""
+import os
+import json
+from datetime import date, datetime
+
+JOURNAL_FILE = "lows_journal.jsonl"
+SUMMARY_FILE = "lows_last_run.json"
+
+# Distance from the low (%) within which a symbol is always scanned first
+NEAR_LOW_PERCENT = 10
+# Age after which a far-from-low reading is re-checked alongside unseen symbols
+STALE_AFTER_DAYS = 7
+
+
+def _read_entries(filename: str) -> list[dict]:
+    """Read journal entries, skipping a truncated final line."""
+    try:
+        with open(filename, 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def _strip_entry(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != 'symbol'}
+
+
+def load_journal(run_id: str, filename: str = JOURNAL_FILE,
+                 summary_file: str = SUMMARY_FILE) -> dict[str, dict]:
+    """Load entries recorded for run_id, keyed by symbol.
+
+    A journal left behind by a different (unfinished) run is discarded after
+    its readings are merged into the summary, so they still inform ordering.
+    A truncated final line (the process died mid-write) is ignored.
+    """
+    entries = _read_entries(filename)
+    stale = [entry for entry in entries if entry.get('run_id') != run_id]
+    if stale:
+        print(f"Discarding stale journal from run {stale[0].get('run_id')}")
+        summary = load_last_summary(summary_file)
+        summary.setdefault('results', {}).update(
+            (entry['symbol'], _strip_entry(entry)) for entry in entries
+        )
+        _write_summary(summary, summary_file)
+        os.remove(filename)
+        return {}
+
+    return {entry['symbol']: entry for entry in entries}
+
+
+def open_journal(filename: str = JOURNAL_FILE):
+    """Open the journal for appending; one JSON object per line."""
+    journal = open(filename, 'a+')
+    # Terminate a line truncated by a crash so new entries start clean
+    if journal.tell() > 0:
+        journal.seek(journal.tell() - 1)
+        if journal.read(1) != "\n":
+            journal.write("\n")
+    return journal
+
+
+def record_result(journal, run_id: str, symbol: str, result: dict) -> None:
+    """Append a processed symbol to the journal and flush it to disk."""
+    entry = {'run_id': run_id, 'symbol': symbol, **result}
+    journal.write(json.dumps(entry) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def _write_summary(summary: dict, summary_file: str) -> None:
+    tmp_file = f"{summary_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(summary, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, summary_file)
+
+
+def compact_journal(run_id: str, journal_file: str = JOURNAL_FILE,
+                    summary_file: str = SUMMARY_FILE) -> None:
+    """Fold a finished run's journal into a single summary file.
+
+    Readings for symbols this run did not cover are kept from earlier runs,
+    each tagged with the run it came from. The summary is written atomically
+    before the journal is removed, so a crash here never loses the results.
+    """
+    entries = load_journal(run_id, journal_file, summary_file)
+    results = load_last_summary(summary_file).get('results', {})
+    results.update((symbol, _strip_entry(entry)) for symbol, entry in entries.items())
+    summary = {
+        'run_id': run_id,
+        'completed_at': datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+    _write_summary(summary, summary_file)
+
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
+
+
+def load_last_summary(summary_file: str = SUMMARY_FILE) -> dict:
+    """Load the compacted summary of the last completed run, if any."""
+    try:
+        with open(summary_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def prioritize_symbols(symbols: list[str], summary: dict, run_id: str) -> list[str]:
+    """Order symbols for a scan using readings from earlier runs.
+
+    Symbols near their low come first, closest first. Symbols never seen, or
+    whose last reading is older than STALE_AFTER_DAYS, come next, oldest
+    first, so a scan cut short each session still works through the whole
+    universe. Recently checked symbols far from their low come last, and
+    symbols whose last fetch failed end their tier.
+    """
+    results = summary.get('results', {})
+    today = date.fromisoformat(run_id)
+
+    def priority(symbol: str) -> tuple[int, float]:
+        if symbol not in results:
+            return (1, float('-inf'))
+
+        result = results[symbol]
+        percent = result.get('percent_from_low')
+        observed = date.fromisoformat(result.get('run_id') or summary['run_id'])
+        age = (today - observed).days
+        if percent is None:
+            # Symbols whose last fetch failed go to the end of their tier
+            return (1 if age > STALE_AFTER_DAYS else 2, float('inf'))
+        if abs(percent) < NEAR_LOW_PERCENT:
+            return (0, abs(percent))
+        if age > STALE_AFTER_DAYS:
+            return (1, -age)
+        return (2, abs(percent))
+
+    return sorted(symbols, key=priority)
@@ -5,13 +5,15 @@ Monitors stock price movements and sends alerts via Discord webhook.
 """
 import os
 import json
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, timedelta
 
 import yfinance as yf
 import requests
 from dotenv import load_dotenv
 
+import price_matrix
+import trading_calendar
+
 load_dotenv()
 
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
@@ -23,27 +25,89 @@ EXCLUDED_PUBLISHERS = ["Benzinga", "Motley Fool", "TheStreet.com", "Business Ins
 DAILY_PERCENT_THRESHOLD = 2
 LOW_52_WEEK_PERCENT_THRESHOLD = 3
 
+LAST_BARS_FILE = "last_bars.json"
+PRICE_HISTORY_PERIOD = timedelta(days=730)
 
-def get_current_price(symbol: str) -> float | None:
-    """Get the most recent price for a symbol using 1-minute interval data."""
+
+def get_current_bar(symbol: str) -> tuple[float, datetime] | None:
+    """Get the most recent 1-minute bar's close and the time that bar ended."""
     ticker = yf.Ticker(symbol)
     data = ticker.history(period="1d", interval="1m")
     
     if not data.empty:
-        return float(data['Close'].iloc[-1])
+        bar_end = data.index[-1].to_pydatetime() + timedelta(minutes=1)
+        return float(data['Close'].iloc[-1]), bar_end
     return None
 
 
+def get_current_price(symbol: str) -> float | None:
+    """Get the most recent price for a symbol using 1-minute interval data."""
+    bar = get_current_bar(symbol)
+    return bar[0] if bar else None
+
+
 def get_previous_close(symbol: str) -> float | None:
     """Get the previous day's closing price for a symbol."""
     ticker = yf.Ticker(symbol)
-    data = ticker.history(period="5d", interval="1d")
+    data = ticker.history(period="5d", interval="1d", auto_adjust=False)
+    record_price_history(symbol, data)
     
     if len(data) >= 2:
         return float(data['Close'].iloc[-2])
     return None
 
 
+def has_stock_split(data) -> bool:
+    """Check if a yfinance history frame includes a stock split."""
+    return 'Stock Splits' in data and bool((data['Stock Splits'] != 0).any())
+
+
+def record_price_history(symbol: str, data, covered_from: date | None = None) -> None:
+    """Store daily bars in the shared price matrix; failures never stop alerts.
+
+    yfinance split-adjusts every bar it returns, so a frame containing a split
+    is on a different basis than the stored row; the row is reset first.
+    """
+    try:
+        if has_stock_split(data):
+            print(f"  {symbol} split - resetting stored price history")
+            price_matrix.reset_history(symbol)
+        price_matrix.record_bars(symbol, data, covered_from)
+    except Exception as e:
+        print(f"Warning: could not record {symbol} in price matrix: {e}")
+
+
+def sync_price_history(symbol: str) -> bool:
+    """Fetch daily bars missing from the price matrix for a symbol.
+
+    Symbols without PRICE_HISTORY_PERIOD of contiguous history are backfilled
+    in full; otherwise only sessions after that history are requested.
+    Bars are split-adjusted but not dividend-adjusted, so an incremental
+    fetch that contains a split triggers a full backfill on the new basis.
+    Returns False without any network call when the symbol is already up
+    to date.
+    """
+    last_session = trading_calendar.last_completed_session()
+    history_start = last_session - PRICE_HISTORY_PERIOD
+    coverage = price_matrix.history_coverage(symbol)
+    
+    if coverage is None or coverage[0] > history_start:
+        fetch_start = history_start
+    elif coverage[1] >= last_session:
+        return False
+    else:
+        fetch_start = coverage[1] + timedelta(days=1)
+    
+    ticker = yf.Ticker(symbol)
+    data = ticker.history(start=fetch_start, interval="1d", auto_adjust=False)
+    if fetch_start != history_start and has_stock_split(data):
+        fetch_start = history_start
+        data = ticker.history(start=fetch_start, interval="1d", auto_adjust=False)
+    
+    record_price_history(symbol, data, fetch_start)
+    return True
+
+
 def get_52_week_low(symbol: str) -> float | None:
     """Get the 52-week low price for a symbol."""
     ticker = yf.Ticker(symbol)
@@ -133,8 +197,11 @@ def send_daily_updates(symbol: str, current_price: float, previous_close: float)
             send_discord_message(title, description, color)
 
 
-def send_52_week_low_alert(symbol: str, current_price: float, low_52_week: float) -> None:
-    """Send alert if price is near 52-week low."""
+def send_52_week_low_alert(symbol: str, current_price: float, low_52_week: float) -> bool | None:
+    """Send alert if price is near 52-week low.
+
+    Returns None when no alert is due, otherwise whether it was delivered.
+    """
     price_change = current_price - low_52_week
     percent_from_low = (price_change / low_52_week) * 100
     
@@ -144,7 +211,8 @@ def send_52_week_low_alert(symbol: str, current_price: float, low_52_week: float
             f"Current Price ${current_price:.2f} is within {percent_from_low:.2f}% "
             f"of 52 Week low of ${low_52_week:.2f}"
         )
-        send_discord_message(title, description, 5832883)
+        return send_discord_message(title, description, 5832883)
+    return None
 
 
 def load_index_symbols(filename: str) -> list[str]:
@@ -158,24 +226,53 @@ def load_index_symbols(filename: str) -> list[str]:
 
 
 def is_market_closed() -> bool:
-    """Check if US market is closed (after 4:00 PM ET)."""
-    eastern_tz = ZoneInfo('America/New_York')
-    current_time = datetime.now(eastern_tz).time()
-    market_close = datetime.strptime("16:00:00", "%H:%M:%S").time()
-    return current_time >= market_close
+    """Check if US market is closed (outside the NYSE regular session)."""
+    return not trading_calendar.is_market_open()
+
+
+def load_last_bar(job: str, filename: str = LAST_BARS_FILE) -> datetime | None:
+    """Load the timestamp of the newest bar a job has already processed."""
+    try:
+        with open(filename, 'r') as f:
+            last_bars = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    
+    last_bar = last_bars.get(job)
+    return datetime.fromisoformat(last_bar) if last_bar else None
+
+
+def save_last_bar(job: str, last_bar: datetime, filename: str = LAST_BARS_FILE) -> None:
+    """Record the timestamp of the newest bar a job has processed."""
+    try:
+        with open(filename, 'r') as f:
+            last_bars = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        last_bars = {}
+    
+    last_bars[job] = last_bar.isoformat()
+    with open(filename, 'w') as f:
+        json.dump(last_bars, f)
 
 
 def main():
     """Main execution function."""
     print(f"Starting stock tracker at {datetime.now()}")
     
+    if not trading_calendar.has_new_data(load_last_bar('tracker')):
+        print("No new market data since last run - skipping")
+        return
+    
     # Monitor watchlist for daily price movements
+    bar_ends = []
     for symbol in STOCK_NAMES:
         print(f"\nChecking {symbol}...")
-        current_price = get_current_price(symbol)
+        current_bar = get_current_bar(symbol)
         previous_close = get_previous_close(symbol)
         
-        if current_price is not None and previous_close is not None:
+        if current_bar is not None and previous_close is not None:
+            current_price, bar_end = current_bar
+            bar_ends.append(bar_end)
             print(f"  Current: ${current_price:.2f}, Previous Close: ${previous_close:.2f}")
             send_daily_updates(symbol, current_price, previous_close)
         else:
@@ -193,6 +290,9 @@ def main():
             if current_price is not None and low_52_week is not None:
                 send_52_week_low_alert(symbol, current_price, low_52_week)
     
+    # Only mark bars as processed once every watchlist symbol was fetched
+    if len(bar_ends) == len(STOCK_NAMES):
+        save_last_bar('tracker', min(bar_ends))
     print("\nStock tracker completed")
 
 
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Offline NYSE trading calendar.
+Computes regular sessions, exchange holidays and early closes from the
+exchange's published rules so no network access is needed.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Unscheduled closures that no rule can predict (weather, national mourning)
+SPECIAL_CLOSURES = {
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "National Day of Mourning for George H.W. Bush",
+    date(2025, 1, 9): "National Day of Mourning for Jimmy Carter",
+}
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Shift a weekend holiday to the nearest weekday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> dict[date, str]:
+    """Full-day NYSE closures for a year, keyed by date."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter_sunday(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+
+    # NYSE does not close on Friday Dec 31 when New Year's Day is a Saturday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+
+    holidays.update({d: name for d, name in SPECIAL_CLOSURES.items() if d.year == year})
+    return holidays
+
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year: int) -> frozenset[date]:
+    """Sessions that close at 1:00 PM ET."""
+    candidates = [
+        date(year, 7, 3) if date(year, 7, 4).weekday() < 5 else None,
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+    return frozenset(d for d in candidates if d is not None and is_trading_day(d))
+
+
+def is_trading_day(day: date) -> bool:
+    """Check if the exchange holds a session on this date."""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def previous_trading_day(day: date) -> date:
+    """The last trading day strictly before this date."""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def next_trading_day(day: date) -> date:
+    """The first trading day strictly after this date."""
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def session_open(day: date) -> datetime:
+    """Opening time of a trading day's session (ET)."""
+    return datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ)
+
+
+def session_close(day: date) -> datetime:
+    """Closing time of a trading day's session (ET), including early closes."""
+    close = EARLY_CLOSE if day in nyse_early_closes(day.year) else MARKET_CLOSE
+    return datetime.combine(day, close, tzinfo=MARKET_TZ)
+
+
+def _now(now: datetime | None) -> datetime:
+    return now.astimezone(MARKET_TZ) if now else datetime.now(MARKET_TZ)
+
+
+def is_market_open(now: datetime | None = None) -> bool:
+    """Check if a regular session is in progress."""
+    now = _now(now)
+    today = now.date()
+    return is_trading_day(today) and session_open(today) <= now < session_close(today)
+
+
+def last_completed_session(now: datetime | None = None) -> date:
+    """The most recent trading day whose session has closed."""
+    now = _now(now)
+    today = now.date()
+    if is_trading_day(today) and now >= session_close(today):
+        return today
+    return previous_trading_day(today)
+
+
+def latest_data_time(now: datetime | None = None) -> datetime:
+    """Timestamp of the newest bar the market can have produced by now."""
+    now = _now(now)
+    if is_market_open(now):
+        return now
+    return session_close(last_completed_session(now))
+
+
+def has_new_data(last_bar: datetime | None, now: datetime | None = None) -> bool:
+    """Check if bars newer than last_bar can exist, so a fetch is worthwhile."""
+    return last_bar is None or last_bar < latest_data_time(now)
+
+
+def trading_days(start: date, end: date) -> list[date]:
+    """All trading days from start to end, inclusive."""
+    days = []
+    day = start
+    while day <= end:
+        if is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days